@@ -0,0 +1,42 @@
+import atexit
+import threading
+from collections import deque
+
+# 待输出的消息；满了以后丢弃最旧的，出错刷屏时也不会无限占用内存
+_pending = deque(maxlen=256)
+_wakeup = threading.Event()
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def _drain():
+    """把积压的消息全部输出"""
+    while _pending:
+        try:
+            print(_pending.popleft(), flush=True)
+        except IndexError:
+            break
+
+
+def _writer_loop():
+    while True:
+        _wakeup.wait()
+        _wakeup.clear()
+        _drain()
+
+
+def async_print(message):
+    """非阻塞输出：消息放入队列后立即返回，由后台线程负责print
+
+    控制台输出在Windows上每次可能阻塞数毫秒，热路径（每帧、每次发送）中的
+    日志都应通过这里输出，避免拖慢主循环和发送线程。
+    """
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = threading.Thread(target=_writer_loop, daemon=True)
+                _writer.start()
+                atexit.register(_drain)  # 退出前把剩余消息输出完
+    _pending.append(message)
+    _wakeup.set()
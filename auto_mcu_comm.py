@@ -1,25 +1,60 @@
 import serial
 import serial.tools.list_ports
+import codecs
+import io
 import time
 import re
+import select
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
+from dataclasses import dataclass
+from operator import attrgetter
+
+# 常见单片机的识别模式
+MCU_PATTERNS = (
+    r'Arduino',
+    r'CH340',
+    r'CP210',
+    r'FT232',
+    r'USB-SERIAL',
+    r'STM32',
+    r'ESP32',
+    r'ESP8266'
+)
+
+# 所有模式合并为一个预编译的交替表达式，一次扫描完成匹配（匹配大写文本）
+MCU_REGEX = re.compile("|".join(MCU_PATTERNS).upper())
+
+# 打开串口时会被DTR信号复位的开发板，需要等待其启动（匹配大写的描述+硬件ID）
+# Linux下描述常是通用的 "USB Serial"/"ttyACM0"，因此同时按USB厂商ID匹配：
+# 2341/2A03=Arduino, 1A86=WCH(CH340), 10C4=Silicon Labs(CP210x), 303A=Espressif
+RESET_ON_OPEN_REGEX = re.compile(r'ARDUINO|CH340|CP210|ESP32|ESP8266|VID:PID=(?:2341|2A03|1A86|10C4|303A):')
+
+@dataclass(slots=True)
+class PortInfo:
+    """串口设备信息及其单片机匹配得分"""
+    device: str
+    description: str
+    hwid: str
+    manufacturer: str
+    score: int = 0
 
 class MicrocontrollerConnection:
-    def __init__(self, baudrate=9600, timeout=1):
+    # USB-CDC串口单个数据包的大小，缓冲区达到该长度时立即写出
+    TX_PACKET_SIZE = 64
+    
+    def __init__(self, baudrate=115200, timeout=1, auto_flush=True, verbose=False):
         self.baudrate = baudrate
         self.timeout = timeout
         self.connection = None
         
-        # 常见单片机的识别模式
-        self.mcu_patterns = [
-            r'Arduino',
-            r'CH340',
-            r'CP210',
-            r'FT232',
-            r'USB-SERIAL',
-            r'STM32',
-            r'ESP32',
-            r'ESP8266'
-        ]
+        # 发送缓冲：auto_flush为False时，小数据先累积，满一个包或调用flush()时再写出
+        self.auto_flush = auto_flush
+        self.verbose = verbose  # 是否打印每次发送的数据
+        self._encode = codecs.getencoder('utf-8')
+        self._txbuf = bytearray()
+        
+        self.mcu_patterns = MCU_PATTERNS
     
     def find_mcu_ports(self):
         """查找可能的单片机串口"""
@@ -27,68 +62,113 @@ class MicrocontrollerConnection:
         mcu_ports = []
         
         for port in ports:
-            port_info = {
-                'device': port.device,
-                'description': port.description,
-                'hwid': port.hwid,
-                'manufacturer': getattr(port, 'manufacturer', 'Unknown'),
-                'score': 0  # 匹配得分
-            }
-            
-            # 根据描述和硬件ID评分
+            # 根据描述和硬件ID评分（每个命中的模式计一次）
             text_to_check = f"{port.description} {port.hwid}".upper()
             
-            for pattern in self.mcu_patterns:
-                if re.search(pattern.upper(), text_to_check):
-                    port_info['score'] += 10
+            score = 10 * len(set(MCU_REGEX.findall(text_to_check)))
             
             # 额外加分条件
             if 'USB' in text_to_check:
-                port_info['score'] += 5
+                score += 5
             if 'SERIAL' in text_to_check:
-                port_info['score'] += 3
+                score += 3
                 
-            mcu_ports.append(port_info)
+            mcu_ports.append(PortInfo(
+                device=port.device,
+                description=port.description,
+                hwid=port.hwid,
+                manufacturer=getattr(port, 'manufacturer', 'Unknown'),
+                score=score
+            ))
         
         # 按得分排序，优先尝试得分高的端口
-        mcu_ports.sort(key=lambda x: x['score'], reverse=True)
+        mcu_ports.sort(key=attrgetter('score'), reverse=True)
         return mcu_ports
     
-    def test_connection(self, port_device, test_commands=['ping\n', 'AT\n', '\n']):
-        """测试串口连接"""
+    def test_connection(self, port_device, test_commands=['ping\n', 'AT\n', '\n'], resets_on_open=False):
+        """测试串口连接
+        
+        每条测试命令最多等待0.2秒，收到第一个字节立即返回，
+        而不是固定睡眠；只有打开时会复位的开发板才额外等待启动。
+        """
         try:
             ser = serial.Serial(
                 port=port_device,
                 baudrate=self.baudrate,
-                timeout=self.timeout,
+                timeout=0.2,
+                write_timeout=self.timeout,  # 串口卡住时写入超时报错，发送线程不会无限阻塞
                 parity=serial.PARITY_NONE,
                 stopbits=serial.STOPBITS_ONE,
                 bytesize=serial.EIGHTBITS
             )
             
-            time.sleep(0.5)  # 等待连接稳定
+            if resets_on_open:
+                time.sleep(0.5)  # 等待开发板复位完成
             
             # 清空输入缓冲区
             ser.reset_input_buffer()
             
-            # 尝试发送测试命令
-            for cmd in test_commands:
-                ser.write(cmd.encode())
-                time.sleep(0.2)
+            try:
+                # 尝试发送测试命令
+                for cmd in test_commands:
+                    ser.write(cmd.encode())
+                    
+                    # 阻塞到第一个字节到达或超时
+                    response = ser.read(1)
+                    if response:
+                        response += ser.read(ser.in_waiting)
+                        print(f"收到响应: {response}")
+                        return ser  # 有响应，认为连接成功
                 
-                if ser.in_waiting > 0:
-                    response = ser.read(ser.in_waiting)
-                    print(f"收到响应: {response}")
-                    return ser  # 有响应，认为连接成功
-            
-            # 即使没有响应，也可能是单片机不回应ping命令
-            print(f"连接到 {port_device}，但无响应（可能正常）")
-            return ser
+                # 即使没有响应，也可能是单片机不回应ping命令
+                print(f"连接到 {port_device}，但无响应（可能正常）")
+                return ser
+            finally:
+                ser.timeout = self.timeout
             
         except Exception as e:
             print(f"连接 {port_device} 失败: {e}")
             return None
     
+    def _probe_ports(self, ports):
+        """探测一组端口，返回得分最高的成功连接 (port, connection)
+        
+        按得分从高到低分档，同一得分的端口并行探测，某一档有端口连接成功即停止，
+        更低分的端口不会被打开。注意：被探测的端口都会被打开并收到测试命令，
+        Arduino类开发板打开时还会被DTR信号复位；同档中未被选中的成功连接会被关闭。
+        """
+        for _, tier in groupby(sorted(ports, key=attrgetter('score'), reverse=True), key=attrgetter('score')):
+            chosen = self._probe_tier(list(tier))
+            if chosen:
+                return chosen
+        return None
+    
+    def _probe_tier(self, ports):
+        """并行探测同一得分的端口，总耗时取决于最慢的单个端口而不是所有端口之和"""
+        for port in ports:
+            print(f"尝试连接到 {port.device}...")
+        
+        with ThreadPoolExecutor(max_workers=len(ports)) as executor:
+            futures = [
+                executor.submit(
+                    self.test_connection,
+                    port.device,
+                    resets_on_open=bool(RESET_ON_OPEN_REGEX.search(f"{port.description} {port.hwid}".upper()))
+                )
+                for port in ports
+            ]
+            connections = [future.result() for future in futures]
+        
+        chosen = None
+        for port, connection in zip(ports, connections):
+            if connection is None:
+                continue
+            if chosen is None:
+                chosen = (port, connection)
+            else:
+                connection.close()
+        return chosen
+    
     def auto_connect(self):
         """自动连接单片机"""
         mcu_ports = self.find_mcu_ports()
@@ -99,30 +179,25 @@ class MicrocontrollerConnection:
         
         print("检测到的串口设备（按可能性排序）：")
         for i, port in enumerate(mcu_ports):
-            print(f"{i+1}. {port['device']} - {port['description']} (得分: {port['score']})")
+            print(f"{i+1}. {port.device} - {port.description} (得分: {port.score})")
         
-        # 尝试连接，优先尝试得分高的
-        for port in mcu_ports:
-            if port['score'] > 0:  # 只尝试有可能是单片机的端口
-                print(f"\n尝试连接到 {port['device']}...")
-                connection = self.test_connection(port['device'])
-                
-                if connection:
-                    self.connection = connection
-                    print(f"✓ 成功连接到 {port['device']}")
-                    return True
-        
-        # 如果没有高分端口成功，尝试所有端口
-        print("\n尝试连接其他端口...")
-        for port in mcu_ports:
-            if port['score'] == 0:
-                print(f"尝试连接到 {port['device']}...")
-                connection = self.test_connection(port['device'])
-                
-                if connection:
-                    self.connection = connection
-                    print(f"✓ 成功连接到 {port['device']}")
-                    return True
+        # 尝试连接，优先尝试得分高的（只尝试有可能是单片机的端口）
+        print()
+        chosen = self._probe_ports([port for port in mcu_ports if port.score > 0])
+        
+        # 如果没有高分端口成功，逐个尝试其余端口（可能是无关的串口设备，成功一个即停止）
+        if not chosen:
+            print("\n尝试连接其他端口...")
+            for port in mcu_ports:
+                if port.score == 0:
+                    chosen = self._probe_tier([port])
+                    if chosen:
+                        break
+        
+        if chosen:
+            port, self.connection = chosen
+            print(f"✓ 成功连接到 {port.device}")
+            return True
         
         print("❌ 无法连接到任何设备")
         return False
@@ -135,45 +210,91 @@ class MicrocontrollerConnection:
         
         try:
             if isinstance(data, str):
-                data = data.encode('utf-8')
+                data = self._encode(data)[0]
             
-            self.connection.write(data)
-            print(f"✓ 已发送: {data}")
+            self._txbuf += data
+            if self.auto_flush or len(self._txbuf) >= self.TX_PACKET_SIZE:
+                self.flush()
+            
+            if self.verbose:
+                print(f"✓ 已发送: {data}")
             return True
         except Exception as e:
             print(f"❌ 发送失败: {e}")
             return False
     
+    def flush(self):
+        """写出发送缓冲区中累积的数据"""
+        if self._txbuf and self.connection and self.connection.is_open:
+            try:
+                self.connection.write(self._txbuf)
+            finally:
+                self._txbuf.clear()  # 写失败也丢弃，避免缓冲区无限增长
+    
+    def _wait_for_data(self, timeout):
+        """没有待读数据时最多等待timeout秒，返回等待期间读到的数据（超时返回b''）
+        
+        支持select的平台（Linux/macOS）等待文件描述符可读，不修改串口的timeout属性；
+        Windows的串口没有可select的描述符（fileno()抛出io.UnsupportedOperation），
+        改为临时设置串口超时后阻塞读取一个字节。
+        """
+        conn = self.connection
+        try:
+            ready, _, _ = select.select([conn.fileno()], [], [], timeout)
+            return conn.read(conn.in_waiting) if ready else b''
+        except io.UnsupportedOperation:
+            pass
+        
+        old_timeout = conn.timeout
+        conn.timeout = timeout
+        try:
+            data = conn.read(1)
+        finally:
+            conn.timeout = old_timeout
+        
+        # 第一个字节到达后，把已经到达的其余数据一并读出
+        waiting = conn.in_waiting if data else 0
+        return data + conn.read(waiting) if waiting else data
+    
     def receive(self, timeout=1):
-        """接收数据"""
+        """接收数据
+        
+        有待读数据时直接读取；否则最多等待timeout秒。
+        """
         if not self.connection or not self.connection.is_open:
             return None
         
         try:
-            old_timeout = self.connection.timeout
-            self.connection.timeout = timeout
+            waiting = self.connection.in_waiting
+            if waiting:
+                data = self.connection.read(waiting)
+            elif timeout:
+                data = self._wait_for_data(timeout)
+            else:
+                data = b''
             
-            if self.connection.in_waiting > 0:
-                data = self.connection.read(self.connection.in_waiting)
-                return data.decode('utf-8', errors='ignore')
+            if data:
+                return data.decode('ascii', errors='ignore')
             
             return None
         except Exception as e:
             print(f"接收数据失败: {e}")
             return None
-        finally:
-            self.connection.timeout = old_timeout
     
     def close(self):
         """关闭连接"""
         if self.connection and self.connection.is_open:
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"❌ 发送剩余数据失败: {e}")
             self.connection.close()
             print("串口连接已关闭")
 
 def main():
     """使用示例"""
     # 创建连接对象
-    mcu = MicrocontrollerConnection(baudrate=9600)
+    mcu = MicrocontrollerConnection(baudrate=115200, verbose=True)
     
     # 自动连接
     if mcu.auto_connect():
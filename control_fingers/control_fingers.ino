@@ -83,7 +83,7 @@ void moveFinger(int fingerId, bool flex, int iteration) {
 }
 
 void setup() {
- Serial.begin(9600);
+ Serial.begin(115200);
    
  for(int i = 0; i < 5; i++) {
   pinMode(hall[i][0], INPUT);
@@ -0,0 +1,445 @@
+import cv2
+import mediapipe as mp # type: ignore
+from mediapipe.framework.formats import landmark_pb2 # type: ignore
+import time
+import math
+import numpy as np
+import os
+from collections import namedtuple
+from itertools import chain
+from pathlib import Path
+
+from async_log import async_print
+
+# numba为可选依赖，未安装时拇指打分和手指角度以纯Python执行
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        """未安装numba时的占位装饰器，原样返回被装饰的函数"""
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+# 手指顺序及显示名称
+FINGERS = ("thumb", "index", "middle", "ring", "pinky")
+FINGER_LABELS = ("Thumb", "Index", "Middle", "Ring", "Pinky")
+
+# 检测不到手时的默认值（按 FINGERS 顺序排列的只读数组）
+NO_HAND_ANGLES = np.full(len(FINGERS), 180.0)
+NO_HAND_ANGLES.flags.writeable = False
+NO_HAND_STATES = np.zeros(len(FINGERS), dtype=bool)
+NO_HAND_STATES.flags.writeable = False
+
+# 定义每个手指的角度范围
+FINGER_ANGLE_RANGES = {
+    "thumb": {"min": 120, "max": 180},
+    "index": {"min": 5, "max": 180},
+    "middle": {"min": 5, "max": 180},
+    "ring": {"min": 5, "max": 180},
+    "pinky": {"min": 5, "max": 180}
+}
+
+# 按 FINGERS 顺序展开的角度下限和范围宽度，供向量化归一化使用
+FINGER_ANGLE_MINS = np.array([FINGER_ANGLE_RANGES[finger]["min"] for finger in FINGERS], dtype=np.float64)
+FINGER_ANGLE_SPANS = np.array(
+    [FINGER_ANGLE_RANGES[finger]["max"] - FINGER_ANGLE_RANGES[finger]["min"] for finger in FINGERS],
+    dtype=np.float64
+)
+
+# 食指、中指、无名指、小指的 (MCP, PIP, TIP) 关键点下标及弯曲判定阈值（度）
+FINGER_JOINT_IDX = np.array([[5, 6, 8], [9, 10, 12], [13, 14, 16], [17, 18, 20]])
+FINGER_BENT_THRESHOLDS = np.array([50, 50, 60, 120], dtype=np.float32)
+
+# 拇指弯曲打分：角度、距离、投影、横向四项得分的权重，加权和超过阈值判为弯曲
+THUMB_SCORE_WEIGHTS = (0.3, 0.25, 0.25, 0.2)
+THUMB_BENT_THRESHOLD = 0.4
+
+# MediaPipe Tasks手部模型（可选）：存在时手部检测改用HandLandmarker并优先走GPU
+HAND_LANDMARKER_MODEL = Path(__file__).resolve().with_name("hand_landmarker.task")
+
+def normalize_angles(angles):
+    """批量归一化按 FINGERS 顺序排列的角度数组，返回 float64 数组（不取整）"""
+    return np.clip((angles - FINGER_ANGLE_MINS) / FINGER_ANGLE_SPANS, 0.0, 1.0)
+
+# 检测不到手时的归一化角度（只读）
+NO_HAND_NORMALIZED = normalize_angles(NO_HAND_ANGLES)
+NO_HAND_NORMALIZED.flags.writeable = False
+
+# 手部骨架的21条连线（与 mp.solutions.hands.HAND_CONNECTIONS 相同），每行为两端关键点下标
+HAND_EDGES = np.array([
+    [0, 1], [1, 2], [2, 3], [3, 4],
+    [0, 5], [5, 6], [6, 7], [7, 8],
+    [5, 9], [9, 10], [10, 11], [11, 12],
+    [9, 13], [13, 14], [14, 15], [15, 16],
+    [13, 17], [0, 17], [17, 18], [18, 19], [19, 20]
+])
+HAND_EDGE_COLOR = (224, 224, 224)
+HAND_JOINT_COLOR = (0, 0, 255)
+
+def draw_hand(frame, lm_px):
+    """绘制手部骨架，lm_px 为 (21, 2) int32 像素坐标
+    
+    连线和关节各用一次 cv2.polylines 画完；关节是长度为0的线段，粗线的圆头即为实心圆点。
+    """
+    cv2.polylines(frame, lm_px[HAND_EDGES], False, HAND_EDGE_COLOR, 2)
+    cv2.polylines(frame, lm_px[:, None, :].repeat(2, axis=1), False, HAND_JOINT_COLOR, 5)
+
+# 与 mp.solutions.hands 的 process() 返回值结构一致的检测结果
+HandResults = namedtuple("HandResults", "multi_hand_landmarks")
+
+class HandDetector():
+    """MediaPipe手部关键点检测，main.py 与 main_2.py 共用"""
+    def __init__(self, mode=False, maxHands=1, detectionCon=0.6, trackCon=0.3, infer_size=(320, 240),
+                 motion_threshold=1.5, idle_frames=30, model_asset_path=None, use_gpu=True):
+        self.mode = mode
+        self.maxHands = maxHands
+        self.detectionCon = detectionCon
+        self.trackCon = trackCon
+        # 送入MediaPipe推理的图像尺寸 (宽, 高)，None 表示使用原图
+        # 关键点坐标是归一化的，缩小推理图像不影响在原图上的定位
+        self.infer_size = infer_size
+        # 复用的缩放缓冲区和RGB缓冲区，尺寸变化时重新分配
+        self._small_buf = None
+        self._rgb_bufs = []
+        self._rgb_index = 0
+        # 复用的关键点缓冲区，第0列为固定的关键点编号
+        self._lm_buf = np.empty((21, 3), dtype=np.int32)
+        self._lm_buf[:, 0] = np.arange(21)
+        self._lm_empty = self._lm_buf[:0]
+        # 每只手的归一化坐标 (21, 2)，只在识别结果更新时重新提取；画面静止沿用结果的帧直接复用
+        self._hands_xy = []
+        self._hands_xy_source = None
+        # 画面静止门限：64x48灰度缩略图的平均绝对差低于该值时沿用上一次的识别结果，None 表示每帧都识别
+        self.motion_threshold = motion_threshold
+        self._prev_gray = None
+        # 空闲降频：连续这么多帧没有手时改为隔帧识别，None 表示始终每帧识别
+        self.idle_frames = idle_frames
+        self._miss_count = 0
+        self.results = None
+
+        self.mpHands = mp.solutions.hands
+        
+        # 提供了模型文件时使用Tasks API的HandLandmarker（可走GPU代理），否则使用旧版CPU接口
+        self._landmarker = None
+        self._last_timestamp_ms = 0
+        if model_asset_path is not None:
+            self._landmarker = self._create_landmarker(model_asset_path, use_gpu)
+        if self._landmarker is None:
+            self.hands = self.mpHands.Hands(
+                static_image_mode=self.mode,
+                max_num_hands=self.maxHands,
+                min_detection_confidence=self.detectionCon,
+                min_tracking_confidence=self.trackCon
+            )
+
+    def _create_landmarker(self, model_asset_path, use_gpu):
+        """创建LIVE_STREAM模式的HandLandmarker，优先GPU代理，失败时回退CPU；都不可用返回None"""
+        if not os.path.exists(model_asset_path):
+            print(f"⚠️ 未找到手部模型 {model_asset_path}，使用 mp.solutions.hands (CPU)")
+            return None
+        try:
+            from mediapipe.tasks.python import BaseOptions
+            from mediapipe.tasks.python.vision import HandLandmarker, HandLandmarkerOptions, RunningMode
+        except ImportError as e:
+            print(f"⚠️ 当前mediapipe不支持Tasks API，使用 mp.solutions.hands (CPU): {e}")
+            return None
+        
+        delegates = [BaseOptions.Delegate.GPU, BaseOptions.Delegate.CPU] if use_gpu else [BaseOptions.Delegate.CPU]
+        for delegate in delegates:
+            try:
+                options = HandLandmarkerOptions(
+                    base_options=BaseOptions(model_asset_path=str(model_asset_path), delegate=delegate),
+                    running_mode=RunningMode.LIVE_STREAM,
+                    num_hands=self.maxHands,
+                    min_hand_detection_confidence=self.detectionCon,
+                    min_hand_presence_confidence=self.detectionCon,
+                    min_tracking_confidence=self.trackCon,
+                    result_callback=self._on_landmarker_result
+                )
+                landmarker = HandLandmarker.create_from_options(options)
+                print(f"✅ 手部检测使用 HandLandmarker ({delegate.name})")
+                return landmarker
+            except Exception as e:
+                print(f"⚠️ 创建 HandLandmarker 失败 ({delegate.name}): {e}")
+        return None
+
+    def _on_landmarker_result(self, result, output_image, timestamp_ms):
+        """HandLandmarker结果回调（在MediaPipe线程中执行），转换为与 mp.solutions.hands 相同的结构"""
+        multi_hand_landmarks = None
+        if result.hand_landmarks:
+            multi_hand_landmarks = [
+                landmark_pb2.NormalizedLandmarkList(landmark=[
+                    landmark_pb2.NormalizedLandmark(x=lm.x, y=lm.y, z=lm.z) for lm in hand
+                ])
+                for hand in result.hand_landmarks
+            ]
+        # 整体替换引用，读取方总能看到完整的一次结果
+        self.results = HandResults(multi_hand_landmarks)
+
+    def warmup(self, frame_shape=(480, 640, 3)):
+        """用空白画面跑两次识别，让MediaPipe图的构建和首次推理发生在主循环之前"""
+        blank = np.zeros(frame_shape, dtype=np.uint8)
+        for _ in range(2):
+            self.findHands(blank, draw=False)
+
+    def _next_rgb_buffer(self, shape):
+        """取下一块RGB缓冲区
+        
+        旧版接口同步处理，一块缓冲区即可；HandLandmarker异步处理且直接引用缓冲区，
+        LIVE_STREAM的流量限制下最多一帧在处理、一帧在排队，轮换三块保证不会覆盖未处理完的画面。
+        """
+        bufs = self._rgb_bufs
+        if not bufs or bufs[0].shape != shape:
+            count = 3 if self._landmarker is not None else 1
+            bufs[:] = [np.empty(shape, dtype=np.uint8) for _ in range(count)]
+        self._rgb_index = (self._rgb_index + 1) % len(bufs)
+        return bufs[self._rgb_index]
+
+    def _skip_idle_frame(self):
+        """连续 idle_frames 帧没有检测到手后隔帧识别，手出现后立即恢复每帧识别"""
+        results = self.results
+        if results is not None and results.multi_hand_landmarks:
+            self._miss_count = 0
+            return False
+        
+        self._miss_count += 1
+        if self.idle_frames is None or self._miss_count <= self.idle_frames:
+            return False
+        return self._miss_count % 2 == 0
+
+    def _needs_inference(self, frame):
+        """判断本帧是否需要重新识别：只有已检测到手且画面几乎没有变化时才跳过"""
+        if self.motion_threshold is None:
+            return True
+        
+        gray = cv2.cvtColor(cv2.resize(frame, (64, 48), interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+        prev = self._prev_gray
+        if (prev is not None and self.results is not None and self.results.multi_hand_landmarks
+                and cv2.norm(gray, prev, cv2.NORM_L1) < self.motion_threshold * gray.size):
+            return False
+        
+        # 与最近一次实际识别的画面比较，缓慢变化也会累积到门限
+        self._prev_gray = gray
+        return True
+
+    def _infer(self, frame):
+        """缩小画面并提交识别（画面静止时跳过），结果写入 self.results"""
+        # 摄像头直接按推理尺寸采集时不必再缩放一遍
+        if self.infer_size is not None and frame.shape[1::-1] != tuple(self.infer_size):
+            w, h = self.infer_size
+            if self._small_buf is None or self._small_buf.shape != (h, w) + frame.shape[2:]:
+                self._small_buf = np.empty((h, w) + frame.shape[2:], dtype=frame.dtype)
+            small = cv2.resize(frame, self.infer_size, dst=self._small_buf, interpolation=cv2.INTER_AREA)
+        else:
+            small = frame
+        
+        # 静止判断直接用缩小后的画面生成缩略图，不必再扫描一遍原图
+        if self._needs_inference(small):
+            rgb = self._next_rgb_buffer(small.shape)
+            
+            # 写入前恢复可写，写完后标记只读，MediaPipe对只读输入不再做内部拷贝
+            rgb.flags.writeable = True
+            cv2.cvtColor(small, cv2.COLOR_BGR2RGB, dst=rgb)
+            rgb.flags.writeable = False
+            if self._landmarker is not None:
+                # 异步提交，结果由回调写入 self.results；时间戳必须严格递增
+                timestamp_ms = max(time.monotonic_ns() // 1_000_000, self._last_timestamp_ms + 1)
+                self._last_timestamp_ms = timestamp_ms
+                # 连续且只读的缓冲区直接被mp.Image引用，不再拷贝一份整帧
+                image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb)
+                self._landmarker.detect_async(image, timestamp_ms)
+            else:
+                self.results = self.hands.process(rgb)
+
+    def findHands(self, frame, draw=True):
+        try:
+            if not self._skip_idle_frame():
+                self._infer(frame)
+            
+            if draw:
+                h, w = frame.shape[:2]
+                for xy in self._landmark_xy():
+                    draw_hand(frame, (xy * (w, h)).astype(np.int32))
+            return frame
+        except Exception as e:
+            async_print(f"❌ HandDetector.findHands 错误: {e}")
+            return frame
+    
+    def _landmark_xy(self):
+        """返回当前识别结果中每只手的归一化坐标数组，结果未变化时直接返回缓存"""
+        results = self.results
+        if results is not self._hands_xy_source:
+            hands = results.multi_hand_landmarks if results is not None else None
+            self._hands_xy = [
+                np.fromiter(chain.from_iterable((lm.x, lm.y) for lm in hand.landmark),
+                            dtype=np.float64, count=2 * len(hand.landmark)).reshape(-1, 2)
+                for hand in hands
+            ] if hands else []
+            self._hands_xy_source = results
+        return self._hands_xy
+    
+    def findPosition(self, frame, handNo=0, draw=False):
+        """返回 (21, 3) int32 数组，每行为 [id, x, y]；检测不到手时返回空数组
+
+        返回的是复用的内部缓冲区，下一次调用会被覆盖。
+        """
+        lmList = self._lm_empty
+        try:
+            hands_xy = self._landmark_xy()
+            if handNo < len(hands_xy):
+                xy = hands_xy[handNo]
+                h, w = frame.shape[:2]
+                
+                # 一次乘法换算成像素坐标，直接截断写入整数缓冲区
+                lmList = self._lm_buf[:len(xy)]
+                np.multiply(xy, (w, h), out=lmList[:, 1:], casting='unsafe')
+
+                if draw:
+                    cv2.circle(frame, (int(lmList[0, 1]), int(lmList[0, 2])), 15, (255, 0, 255), -1)
+        except Exception as e:
+            async_print(f"❌ HandDetector.findPosition 错误: {e}")
+        return lmList
+
+@njit(cache=True, fastmath=True)
+def _joint_angle(ax, ay, bx, by, cx, cy):
+    """三点 a-b-c 在b处的夹角（度），供JIT函数内部调用"""
+    v1x, v1y = ax - bx, ay - by
+    v2x, v2y = cx - bx, cy - by
+    
+    v1_length = math.sqrt(v1x * v1x + v1y * v1y)
+    v2_length = math.sqrt(v2x * v2x + v2y * v2y)
+    if v1_length == 0 or v2_length == 0:
+        return 0.0
+    
+    cos_angle = (v1x * v2x + v1y * v2y) / (v1_length * v2_length)
+    cos_angle = max(-1.0, min(1.0, cos_angle))
+    return math.degrees(math.acos(cos_angle))
+
+@njit(cache=True, fastmath=True)
+def _thumb_core(pts):
+    """拇指弯曲打分的计算核心，pts 为 (21, 2) float32 关键点坐标，返回 (main_angle, is_bent)"""
+    # 取出的坐标先转为float64，后续运算精度与原先的纯Python实现一致
+    wrist_x, wrist_y = float(pts[0, 0]), float(pts[0, 1])
+    cmc_x, cmc_y = float(pts[1, 0]), float(pts[1, 1])
+    mcp_x, mcp_y = float(pts[2, 0]), float(pts[2, 1])
+    ip_x, ip_y = float(pts[3, 0]), float(pts[3, 1])
+    tip_x, tip_y = float(pts[4, 0]), float(pts[4, 1])
+    index_mcp_x, index_mcp_y = float(pts[5, 0]), float(pts[5, 1])
+    middle_mcp_x, middle_mcp_y = float(pts[9, 0]), float(pts[9, 1])
+    
+    angle_cmc_mcp_ip = _joint_angle(cmc_x, cmc_y, mcp_x, mcp_y, ip_x, ip_y)
+    angle_mcp_ip_tip = _joint_angle(mcp_x, mcp_y, ip_x, ip_y, tip_x, tip_y)
+    
+    tip_to_wrist = math.sqrt((tip_x - wrist_x) ** 2 + (tip_y - wrist_y) ** 2)
+    tip_to_index = math.sqrt((tip_x - index_mcp_x) ** 2 + (tip_y - index_mcp_y) ** 2)
+    mcp_to_wrist = math.sqrt((mcp_x - wrist_x) ** 2 + (mcp_y - wrist_y) ** 2)
+    
+    palm_x, palm_y = middle_mcp_x - wrist_x, middle_mcp_y - wrist_y
+    palm_length = math.sqrt(palm_x * palm_x + palm_y * palm_y)
+    if palm_length > 0:
+        projection = ((tip_x - wrist_x) * palm_x + (tip_y - wrist_y) * palm_y) / palm_length
+        projection_ratio = projection / palm_length
+    else:
+        projection_ratio = 0.0
+    
+    # 左右手判断：拇指尖在中指MCP左侧视为右手
+    lateral_offset = tip_x - mcp_x
+    if tip_x < middle_mcp_x:
+        lateral_bent = lateral_offset > -20
+    else:
+        lateral_bent = lateral_offset < 20
+    
+    angle_score = 0.0
+    if angle_cmc_mcp_ip < 160:
+        angle_score += 0.5
+    if angle_mcp_ip_tip < 160:
+        angle_score += 0.5
+    
+    distance_score = 0.0
+    if mcp_to_wrist > 0 and tip_to_wrist / mcp_to_wrist < 1.3:
+        distance_score += 0.5
+    if tip_to_index < 60:
+        distance_score += 0.5
+    
+    projection_score = 1.0 if projection_ratio < 0.5 else 0.0
+    lateral_score = 1.0 if lateral_bent else 0.0
+    
+    # 四项得分与权重的点积（元组在JIT编译时作为常量内联）
+    w_angle, w_distance, w_projection, w_lateral = THUMB_SCORE_WEIGHTS
+    final_score = (angle_score * w_angle + distance_score * w_distance
+                   + projection_score * w_projection + lateral_score * w_lateral)
+    
+    is_bent = final_score > THUMB_BENT_THRESHOLD
+    main_angle = (angle_cmc_mcp_ip + angle_mcp_ip_tip) / 2
+    
+    return main_angle, is_bent
+
+@njit(cache=True, fastmath=True)
+def _finger_angles_core(pts, joint_idx):
+    """四指 (MCP, PIP, TIP) 三点夹角的计算核心，pts 为 (21, 2) float32 关键点坐标，返回 float64 数组"""
+    angles = np.empty(joint_idx.shape[0])
+    for k in range(joint_idx.shape[0]):
+        a, b, c = joint_idx[k, 0], joint_idx[k, 1], joint_idx[k, 2]
+        angles[k] = _joint_angle(float(pts[a, 0]), float(pts[a, 1]),
+                                 float(pts[b, 0]), float(pts[b, 1]),
+                                 float(pts[c, 0]), float(pts[c, 1]))
+    return angles
+
+def landmark_points(lmList):
+    """从 [id, x, y] 关键点表中取出 (21, 2) 连续的float32坐标，只转换坐标两列"""
+    return np.asarray(lmList)[:, 1:3].astype(np.float32)
+
+def calculate_thumb_improved(lmList, pts=None):
+    """改进的拇指检测算法
+
+    pts 为已构造好的 (21, 2) float32 坐标数组，传入时可省去一次转换。
+    """
+    try:
+        if len(lmList) < 21:
+            return 0, False
+        
+        if pts is None:
+            pts = landmark_points(lmList)
+        
+        return _thumb_core(pts)
+    except Exception as e:
+        async_print(f"❌ calculate_thumb_improved 错误: {e}")
+        return 0, False
+
+def warmup_geometry_kernels():
+    """启动时用假数据调用一次各JIT函数，让编译发生在第一帧之前"""
+    pts = np.zeros((21, 2), dtype=np.float32)
+    _thumb_core(pts)
+    _finger_angles_core(pts, FINGER_JOINT_IDX)
+
+def calculate_finger_angles_and_states(lmList):
+    """计算手指角度并智能判断弯曲状态
+    
+    返回 (angles, states) 两个按 FINGERS 顺序排列的数组：float64 角度和 bool 弯曲状态，
+    每帧只分配这两个小数组，不再构造字典。
+    """
+    angles = np.zeros(len(FINGERS))
+    states = np.zeros(len(FINGERS), dtype=bool)
+    
+    try:
+        if len(lmList) < 21:
+            return angles, states
+        
+        pts = landmark_points(lmList)
+        
+        # 拇指特殊处理
+        angles[0], states[0] = calculate_thumb_improved(lmList, pts)
+        
+        # 其余四指：(MCP, PIP, TIP) 三点夹角在JIT函数中一次算完
+        angles[1:] = _finger_angles_core(pts, FINGER_JOINT_IDX)
+        np.less(angles[1:], FINGER_BENT_THRESHOLDS, out=states[1:])
+    
+    except Exception as e:
+        async_print(f"❌ calculate_finger_angles_and_states 错误: {e}")
+    
+    return angles, states
+
+def finger_state_bits(states):
+    """把按 FINGERS 顺序排列的弯曲状态数组打包成整数，第i位对应 FINGERS[i]"""
+    return int(np.packbits(states, bitorder="little")[0])
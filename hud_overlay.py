@@ -0,0 +1,45 @@
+import numpy as np
+
+
+class HudOverlay:
+    """缓存的文字叠加层
+
+    cv2.putText 逐帧绘制十几行文字开销不小，而大部分文字只在状态变化时才改变。
+    这里把文字画到一块缓存的图层上，只有状态键变化或每隔 refresh_frames 帧
+    （刷新数值）时才重画，其余帧只做一次按掩码的拷贝。
+    """
+
+    def __init__(self, refresh_frames=5, rows=270):
+        self.refresh_frames = refresh_frames
+        self.rows = rows  # 文字所在的顶部区域高度，只在该区域内清空和合成
+
+        self.layer = None
+        self._mask = None
+        self._key = None
+        self._age = 0
+
+    def needs_refresh(self, key):
+        """状态键变化或距上次重画已满 refresh_frames 帧时返回True"""
+        self._age += 1
+        return self.layer is None or key != self._key or self._age >= self.refresh_frames
+
+    def begin(self, frame, key):
+        """开始重画：返回清空后的图层，调用方直接在其上 putText"""
+        if self.layer is None or self.layer.shape != frame.shape:
+            self.layer = np.zeros_like(frame)
+        else:
+            self.layer[:self.rows] = 0
+        self._key = key
+        self._age = 0
+        return self.layer
+
+    def end(self):
+        """重画完成：记录图层中有文字的像素"""
+        self._mask = self.layer[:self.rows].any(axis=2, keepdims=True)
+
+    def apply(self, frame):
+        """把缓存的文字合成到当前帧上（不透明覆盖，与直接绘制效果一致）"""
+        if self._mask is not None:
+            rows = self._mask.shape[0]
+            np.copyto(frame[:rows], self.layer[:rows], where=self._mask)
+        return frame
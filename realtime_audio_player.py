@@ -1,42 +1,277 @@
 import pygame
+import argparse
+import atexit
 import json
+import logging
+import os
+import selectors
 import sys
 import numpy as np
 import traceback
 import time
+from collections import deque
+
+# 优先使用更快的JSON解析库（orjson > ujson > 标准库json），接口保持一致
+try:
+    import orjson as _json
+except ImportError:
+    try:
+        import ujson as _json
+    except ImportError:
+        import json as _json
+
+# 手指顺序及对应的音频频率（导入时确定，所有实例共享）
+FINGERS = ("thumb", "index", "middle", "ring", "pinky")
+FINGER_FREQUENCIES = {
+    "thumb": 261.63,   # do (C)
+    "index": 293.66,   # re (D)
+    "middle": 329.63,  # mi (E)
+    "ring": 392.00,    # sol (G)
+    "pinky": 440.00    # la (A)
+}
+FINGER_BITS = tuple((name, 1 << i) for i, name in enumerate(FINGERS))
+ALL_FINGERS_MASK = (1 << len(FINGERS)) - 1
+# 位掩码 -> 其中置位的手指下标，热路径中按表展开，不必逐位循环
+MASK_FINGER_INDICES = tuple(
+    tuple(i for i in range(len(FINGERS)) if mask >> i & 1) for mask in range(1 << len(FINGERS))
+)
+
+# 主程序发出的状态消息只有32种（与 main.py 的 AUDIO_STATE_MESSAGES 编码一致），
+# 预先建立 消息 -> 弯曲位掩码 的查找表，命中时不必再做JSON解析
+STATE_MESSAGE_BITS = {
+    json.dumps({name: bool(bits >> i & 1) for i, name in enumerate(FINGERS)}, separators=(',', ':')).encode(): bits
+    for bits in range(1 << len(FINGERS))
+}
+
+# 默认只输出WARNING及以上的日志，热路径上的debug日志只需一次级别比较
+log = logging.getLogger("realtime_audio_player")
+
+# 可选的PortAudio后端；缺少sounddevice或PortAudio库时使用pygame.mixer
+try:
+    import sounddevice as sd
+except (ImportError, OSError):
+    sd = None
+
+class SoundDeviceChannel:
+    """SoundDeviceMixer中的单个声部，接口与pygame.mixer.Channel保持一致"""
+    
+    __slots__ = ("_mixer", "_index")
+    
+    def __init__(self, mixer, index):
+        self._mixer = mixer
+        self._index = index
+    
+    def play(self, sound):
+        self._mixer.play(self._index, sound)
+    
+    def stop(self):
+        self._mixer.stop(self._index)
+    
+    def get_busy(self):
+        return self._mixer.get_busy(self._index)
+
+class SoundDeviceMixer:
+    """基于sounddevice输出流回调的多声部混音器
+    
+    每个声部对应一个手指。控制线程只向无锁队列追加 (声部, PCM, 序号)
+    控制消息，音频回调线程在每个缓冲区开始时取出并应用，
+    声部的缓冲区、位置和增益只由回调线程修改，混音用NumPy完成。
+    """
+    
+    def __init__(self, num_channels, sample_rate, channels=2):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        
+        # 控制线程 -> 音频线程的消息队列（deque的append/popleft是线程安全的）
+        # 不设上限：回调每个音频块都会清空队列，丢弃play消息会让该声部一直显示忙碌
+        self._control = deque()
+        self._requested = [0] * num_channels  # 控制线程：每个声部最近一次play的序号
+        self._active = [False] * num_channels  # 控制线程：是否处于播放请求中
+        
+        # 以下状态只在音频回调线程中修改
+        self._buffers = [None] * num_channels
+        self._pos = [0] * num_channels
+        self._gain = np.zeros(num_channels, dtype=np.float32)
+        self._playing_seq = [0] * num_channels
+        self._finished_seq = [0] * num_channels  # 已自然播放结束的序号
+        self._mix = np.zeros((0, channels), dtype=np.float32)
+        
+        self._stream = sd.OutputStream(
+            samplerate=sample_rate,
+            channels=channels,
+            dtype="int16",
+            latency="low",
+            callback=self._callback
+        )
+        self._stream.start()
+    
+    def Channel(self, index):
+        return SoundDeviceChannel(self, index)
+    
+    def play(self, index, sound):
+        """从头播放一段 (samples, channels) int16 PCM"""
+        self._requested[index] += 1
+        self._active[index] = True
+        self._control.append((index, sound, self._requested[index]))
+    
+    def stop(self, index):
+        self._active[index] = False
+        self._control.append((index, None, self._requested[index]))
+    
+    def get_busy(self, index):
+        return self._active[index] and self._finished_seq[index] != self._requested[index]
+    
+    def _callback(self, outdata, frames, time_info, status):
+        # 应用所有待处理的控制消息
+        control = self._control
+        while control:
+            i, sound, seq = control.popleft()
+            if sound is None:
+                self._gain[i] = 0.0
+            else:
+                self._buffers[i] = sound
+                self._pos[i] = 0
+                self._gain[i] = 1.0
+                self._playing_seq[i] = seq
+        
+        if self._mix.shape[0] != frames:
+            self._mix = np.zeros((frames, self.channels), dtype=np.float32)
+        mix = self._mix
+        mix.fill(0)
+        
+        for i in np.flatnonzero(self._gain):
+            buf = self._buffers[i]
+            pos = self._pos[i]
+            segment = buf[pos:pos + frames]
+            mix[:len(segment)] += segment * self._gain[i]
+            
+            pos += frames
+            if pos >= len(buf):  # 短音调播放结束
+                self._gain[i] = 0.0
+                self._finished_seq[i] = self._playing_seq[i]
+            self._pos[i] = pos
+        
+        np.clip(mix, -32768, 32767, out=mix)
+        outdata[:] = mix
+    
+    def close(self):
+        """停止并关闭音频流；可重复调用（atexit和cleanup都会调用）"""
+        stream, self._stream = self._stream, None
+        if stream is None:
+            return
+        try:
+            stream.stop()
+            stream.close()
+        except Exception as e:
+            log.warning(f"⚠️ 关闭音频流时出错: {e}")
 
 class FixedAudioPlayer:
-    def __init__(self):
+    """手指音调播放器，既可作为独立进程读取stdin，也可在主程序中直接调用"""
+    
+    def __init__(self, tone_duration=0.5, volume=0.3, release_frames=3):
         # 手指对应的音频频率
-        self.frequencies = {
-            "thumb": 261.63,   # do (C)
-            "index": 293.66,   # re (D)
-            "middle": 329.63,  # mi (E)
-            "ring": 392.00,    # sol (G)
-            "pinky": 440.00    # la (A)
-        }
-        
-        # 当前播放状态
-        self.playing = {finger: False for finger in self.frequencies}
-        self.channels = {}
-        
-        # 防抖设置
-        self.last_change = {finger: 0 for finger in self.frequencies}
-        self.debounce_time = 100  # 100ms防抖
-        
-        # 初始化音频
-        if not self._init_audio():
-            raise Exception("音频初始化失败")
-        
-        # 创建音频（短音调，不使用无限循环）
-        self.sounds = {}
-        for finger, freq in self.frequencies.items():
-            self.sounds[finger] = self._create_tone(freq)
+        self.frequencies = FINGER_FREQUENCIES
+        
+        # 短音调的时长（秒）和音量（0-1）
+        self.tone_duration = tone_duration
+        self.volume = volume
+        
+        # 固定的手指顺序，热路径中按下标访问以下并行数组
+        self._names = FINGERS
+        self._name_bits = FINGER_BITS
+        
+        # 当前播放状态，第i位对应第i个手指
+        self._playing_mask = 0
+        
+        # 迟滞设置：弯曲的第一帧立即发声，连续 release_frames 帧伸直才停止，
+        # 单帧识别抖动不会打断正在播放的音调
+        self.release_frames = max(1, release_frames)
+        # _straight_runs[j] 的第i位表示第i个手指已连续伸直至少 j+1 帧
+        self._straight_runs = [0] * self.release_frames
+        
+        # 音频系统默认延迟到第一次发声时才初始化（见 _ensure_mixer）：
+        # Linux下mixer一旦初始化，SDL音频线程就会持续占用CPU。
+        # 需要第一次起音无等待时由调用方显式调用 warmup()（main_2 内置播放器、--warmup 参数）
+        self._mixer_ready = None  # None=尚未尝试, True/False=初始化结果
+        self._channels = []
+        self._sounds = []
+        self._tone_arena = None
+        self._sd_mixer = None  # 使用sounddevice后端时的混音器
+    
+    @property
+    def playing(self):
+        """各手指播放状态（只读快照）"""
+        return {name: bool(self._playing_mask & bit) for name, bit in self._name_bits}
+    
+    @property
+    def playing_mask(self):
+        """各手指播放状态的位掩码，第i位对应第i个手指（不构造字典）"""
+        return self._playing_mask
+    
+    @property
+    def playing_count(self):
+        """正在播放的手指数量"""
+        return self._playing_mask.bit_count()
+    
+    def _ensure_mixer(self):
+        """确保音频系统已初始化，返回是否可用（只尝试一次）"""
+        if self._mixer_ready is None:
+            # 优先使用PortAudio回调混音，失败时退回pygame.mixer
+            if sd is not None and self._init_sounddevice():
+                self._mixer_ready = True
+            elif self._init_audio():
+                self._mixer_ready = True
+                atexit.register(pygame.mixer.quit)
+                
+                # 每个手指预先分配固定通道，避免每次播放时查找空闲通道
+                self._channels = [pygame.mixer.Channel(i) for i in range(len(self._names))]
+                
+                # 创建音频（短音调，不使用无限循环）
+                self._sounds = self._create_tones()
+            else:
+                self._mixer_ready = False
+                log.error("❌ 音频初始化失败，之后的手势数据将不会发声")
+        return self._mixer_ready
+    
+    def warmup(self):
+        """提前初始化音频系统并播放一小段静音
+        
+        打开设备、启动混音线程都发生在第一个手势之前，第一次起音不再卡顿；
+        代价是放弃懒初始化（空闲时音频线程也在运行），因此只在调用方显式选择时使用：
+        main_2 的内置播放器，或独立进程的 --warmup 参数。返回音频系统是否可用。
+        """
+        if not self._ensure_mixer():
+            return False
+        if self._sd_mixer is None:
+            try:
+                # 在空闲通道上播放静音（手指只占用前几个固定通道）
+                pygame.mixer.Sound(buffer=bytes(1024)).play()
+            except Exception as e:
+                log.warning(f"⚠️ 音频预热失败: {e}")
+        return True
+    
+    def _init_sounddevice(self, sample_rate=44100, channels=2):
+        """初始化sounddevice后端，成功时同时准备好通道和音调"""
+        try:
+            self._sd_mixer = SoundDeviceMixer(len(self._names), sample_rate, channels)
+        except Exception as e:
+            log.warning(f"⚠️ sounddevice后端不可用，改用pygame: {e}")
+            return False
+        
+        atexit.register(self._sd_mixer.close)
+        self._channels = [self._sd_mixer.Channel(i) for i in range(len(self._names))]
+        arena = self._create_tone_arena(sample_rate, channels)
+        self._sounds = list(arena)
+        log.info(f"✅ 音频初始化成功(sounddevice): {sample_rate}Hz, 16bit, {channels}ch")
+        return True
     
     def _init_audio(self):
         """初始化音频系统"""
+        # 首选配置：44100Hz与大多数声卡的原生采样率一致，系统不必再重采样；
+        # 256帧缓冲约5.8ms，起音延迟远低于原先的2048帧（约93ms）
         configs = [
-            {"frequency": 22050, "size": -16, "channels": 2, "buffer": 1024},
+            {"frequency": 44100, "size": -16, "channels": 2, "buffer": 256},
+            {"frequency": 22050, "size": -16, "channels": 2, "buffer": 512},
             {"frequency": 22050, "size": -16, "channels": 1, "buffer": 512},
             {"frequency": 11025, "size": -16, "channels": 2, "buffer": 512},
             {},  # 默认配置
@@ -44,8 +279,9 @@ class FixedAudioPlayer:
         
         for i, config in enumerate(configs):
             try:
-                pygame.mixer.quit()  # 清理之前的初始化
-                time.sleep(0.1)  # 给系统时间清理
+                if i:
+                    pygame.mixer.quit()  # 清理之前失败的初始化
+                    time.sleep(0.1)  # 给系统时间清理
                 
                 if config:
                     pygame.mixer.pre_init(**config)
@@ -55,214 +291,318 @@ class FixedAudioPlayer:
                 
                 # 测试基本功能
                 freq, size, channels = pygame.mixer.get_init()
-                print(f"✅ 音频初始化成功: {freq}Hz, {size}bit, {channels}ch", file=sys.stderr)
+                log.info(f"✅ 音频初始化成功: {freq}Hz, {size}bit, {channels}ch")
                 return True
                 
             except Exception as e:
-                print(f"⚠️ 音频配置{i+1}失败: {e}", file=sys.stderr)
+                log.warning(f"⚠️ 音频配置{i+1}失败: {e}")
                 continue
         
-        print("❌ 所有音频配置都失败", file=sys.stderr)
+        log.error("❌ 所有音频配置都失败")
         return False
     
-    def _create_tone(self, frequency, duration=0.5):
-        """创建短音调，避免无限循环"""
-        try:
-            # 获取当前音频设置
-            freq, size, channels = pygame.mixer.get_init()
-            sample_rate = freq
-            samples = int(sample_rate * duration)
-            
-            # 生成正弦波
-            t = np.linspace(0, duration, samples, False)
-            wave = np.sin(2 * np.pi * frequency * t) * 0.3
-            
-            # 添加淡入淡出
-            fade_len = int(0.02 * sample_rate)  # 20ms淡入淡出
-            if len(wave) > 2 * fade_len:
-                wave[:fade_len] *= np.linspace(0, 1, fade_len)
-                wave[-fade_len:] *= np.linspace(1, 0, fade_len)
-            
-            # 转换为pygame格式
-            wave_int16 = (wave * 16383).astype(np.int16)
-            
-            if channels == 2:
-                stereo_wave = np.column_stack((wave_int16, wave_int16))
-            else:
-                stereo_wave = wave_int16
-            
-            return pygame.sndarray.make_sound(stereo_wave)
-        except Exception as e:
-            print(f"❌ 创建音调失败 {frequency}Hz: {e}", file=sys.stderr)
-            return None
+    def _create_tone_arena(self, sample_rate, channels):
+        """把所有手指的短音调合成到同一块连续的int16内存中
+        
+        返回形状为 (手指数, 采样数[, 声道数]) 的数组，同时保存在
+        self._tone_arena；按手指下标切片即可得到对应音调的PCM。
+        """
+        samples = int(sample_rate * self.tone_duration)
+        frequencies = [self.frequencies[name] for name in self._names]
+        
+        shape = (len(frequencies), samples)
+        if channels > 1:
+            shape += (channels,)
+        arena = np.empty(shape, dtype=np.int16)
+        
+        # 直接合成到第一个声道，其余声道内容相同，从第一个声道复制
+        self._tone_waves(frequencies, sample_rate, samples, self.volume,
+                         out=arena[..., 0] if channels > 1 else arena)
+        if channels > 1:
+            arena[..., 1:] = arena[..., :1]
+        
+        self._tone_arena = arena
+        return arena
     
-    def play_finger(self, finger):
-        """播放手指音调（短音调，连续触发）"""
+    def _create_tones(self):
+        """为pygame后端创建所有手指的短音调，避免无限循环"""
+        # 获取当前音频设置
+        sample_rate, size, channels = pygame.mixer.get_init()
+        arena = self._create_tone_arena(sample_rate, channels)
+        
+        sounds = []
+        for i, name in enumerate(self._names):
+            try:
+                sounds.append(pygame.sndarray.make_sound(arena[i]))
+            except Exception as e:
+                log.error(f"❌ 创建音调失败 {self.frequencies[name]}Hz: {e}")
+                sounds.append(None)
+        return sounds
+    
+    @staticmethod
+    def _tone_waves(frequencies, sample_rate, samples, volume, out=None):
+        """一次生成所有频率的单声道int16正弦波（带20ms淡入淡出），返回 (频率数, 采样数) 数组
+        
+        传入out时直接写入该int16缓冲区（可以是按声道切出的视图），不再另行分配。
+        """
+        # 采样下标，第n个采样的时间为 n / sample_rate
+        # 全程使用float32：精度远超16位PCM所需，sin的SIMD通道数是float64的两倍
+        n = np.arange(samples, dtype=np.float32)
+        
+        # 每行一个频率：相位步长的列向量与采样下标广播，一次sin算出全部音调
+        steps = np.asarray(frequencies, dtype=np.float64)[:, None] * (2 * np.pi / sample_rate)
+        steps = steps.astype(np.float32)
+        wave = n * steps
+        np.sin(wave, out=wave)  # 原地求sin，整个过程只有一块 (频率数, 采样数) 的缓冲区
+        
+        # 音量和int16满幅缩放合并进增益，与淡入淡出包络一起只乘一遍
+        gain = np.float32(volume * 16383)
+        
+        # 添加淡入淡出：到两端距离的梯形包络，所有音调共用，按行广播相乘
+        fade_len = int(0.02 * sample_rate)  # 20ms淡入淡出
+        if samples > 2 * fade_len and fade_len > 1:
+            envelope = np.minimum(n, n[::-1])
+            envelope *= np.float32(1 / (fade_len - 1))
+            np.minimum(envelope, 1, out=envelope)
+            envelope *= gain
+            wave *= envelope
+        else:
+            wave *= gain
+        
+        # 转换为pygame格式：原地四舍五入后直接写入int16缓冲区，不产生临时数组
+        # （增益不超过16383，无需裁剪）
+        np.rint(wave, out=wave)
+        if out is None:
+            out = np.empty(wave.shape, dtype=np.int16)
+        np.copyto(out, wave, casting='unsafe')
+        return out
+    
+    def play_finger(self, i):
+        """播放第i个手指的音调（短音调，连续触发）"""
         try:
-            current_time = time.time() * 1000
-            
-            # 防抖检查
-            if current_time - self.last_change[finger] < self.debounce_time:
+            if not self._ensure_mixer():
                 return
             
-            if finger in self.sounds and self.sounds[finger]:
-                # 停止之前的播放
-                if finger in self.channels and self.channels[finger]:
-                    try:
-                        self.channels[finger].stop()
-                    except:
-                        pass
-                
-                # 播放新的音调（不使用无限循环）
-                channel = self.sounds[finger].play()
-                if channel:
-                    self.channels[finger] = channel
-                    self.playing[finger] = True
-                    self.last_change[finger] = current_time
-                    print(f"🎵 {finger}", file=sys.stderr)
+            sound = self._sounds[i]
+            if sound is not None:
+                # 在固定通道上播放新的音调（会替换该通道上正在播放的音调）
+                self._channels[i].play(sound)
+                self._playing_mask |= 1 << i
+                log.debug("🎵 %s", self._names[i])
                     
         except Exception as e:
-            print(f"❌ 播放失败 {finger}: {e}", file=sys.stderr)
+            log.error(f"❌ 播放失败 {self._names[i]}: {e}")
     
-    def stop_finger(self, finger):
-        """停止手指音调"""
+    def stop_finger(self, i):
+        """停止第i个手指的音调"""
         try:
-            current_time = time.time() * 1000
-            
-            # 防抖检查
-            if current_time - self.last_change[finger] < self.debounce_time:
-                return
-                
-            if finger in self.channels and self.playing[finger]:
+            if self._playing_mask & (1 << i):
                 try:
-                    if self.channels[finger]:
-                        self.channels[finger].stop()
+                    self._channels[i].stop()
                 except:
                     pass
                 
-                self.playing[finger] = False
-                self.last_change[finger] = current_time
-                print(f"⏹️ {finger}", file=sys.stderr)
+                self._playing_mask &= ~(1 << i)
+                log.debug("⏹️ %s", self._names[i])
                 
         except Exception as e:
-            print(f"❌ 停止失败 {finger}: {e}", file=sys.stderr)
+            log.error(f"❌ 停止失败 {self._names[i]}: {e}")
+    
+    def update_finger_states(self, states):
+        """根据手指弯曲状态字典更新播放
+        
+        没有出现在states中的手指保持原状态。
+        """
+        bent_mask = known_mask = 0
+        for name, bit in self._name_bits:
+            bent = states.get(name)
+            if bent is not None:
+                known_mask |= bit
+                if bent:
+                    bent_mask |= bit
+        self.update_finger_bits(bent_mask, known_mask)
+    
+    def update_finger_bits(self, bent_mask, known_mask=ALL_FINGERS_MASK):
+        """根据打包好的弯曲状态位掩码更新播放（第i位对应 FINGERS[i]）
+        
+        只处理真正需要变化的手指：弯曲且未播放的立即起音，
+        连续 release_frames 帧伸直且正在播放的才停止；known_mask 之外的手指保持原状态。
+        """
+        # 更新连续伸直计数：本帧伸直的位沿各级向后传递，其余位清零
+        straight = known_mask & ~bent_mask
+        runs = self._straight_runs
+        for j in range(len(runs) - 1, 0, -1):
+            runs[j] = runs[j - 1] & straight
+        runs[0] = straight
+        
+        # 弯曲且未播放 -> 开始播放
+        for i in MASK_FINGER_INDICES[bent_mask & known_mask & ~self._playing_mask]:
+            self.play_finger(i)
+        
+        # 连续伸直足够帧且正在播放 -> 停止
+        for i in MASK_FINGER_INDICES[runs[-1] & self._playing_mask]:
+            self.stop_finger(i)
     
     def process_data(self, data):
-        """处理接收到的数据"""
+        """处理接收到的数据（bytes或str，允许带行尾空白）"""
         try:
-            states = json.loads(data)
-            
-            for finger in self.frequencies:
-                if finger in states:
-                    if states[finger]:  # 弯曲
-                        if not self.playing[finger]:  # 只有在没有播放时才开始播放
-                            self.play_finger(finger)
-                    else:  # 伸直
-                        if self.playing[finger]:  # 只有在播放时才停止
-                            self.stop_finger(finger)
-                        
-        except json.JSONDecodeError as e:
-            print(f"❌ JSON解析错误: {e}", file=sys.stderr)
+            bits = STATE_MESSAGE_BITS.get(data.strip()) if isinstance(data, bytes) else None
+            if bits is not None:
+                self.update_finger_bits(bits)
+            else:
+                self.update_finger_states(_json.loads(data))
+        except ValueError as e:  # 三种库的解析错误均为ValueError子类
+            log.error(f"❌ JSON解析错误: {e}")
         except Exception as e:
-            print(f"❌ 数据处理错误: {e}", file=sys.stderr)
+            log.error(f"❌ 数据处理错误: {e}")
     
     def stop_all(self):
         """停止所有播放"""
-        for finger in self.frequencies:
-            if self.playing[finger]:
+        for i, name in enumerate(self._names):
+            if self._playing_mask & (1 << i):
                 try:
-                    if finger in self.channels and self.channels[finger]:
-                        self.channels[finger].stop()
-                    self.playing[finger] = False
+                    self._channels[i].stop()
+                    self._playing_mask &= ~(1 << i)
                 except Exception as e:
-                    print(f"⚠️ 停止{finger}时出错: {e}", file=sys.stderr)
+                    log.warning(f"⚠️ 停止{name}时出错: {e}")
     
     def cleanup_dead_channels(self):
-        """清理已结束的通道"""
+        """同步已播放结束的通道状态"""
         try:
-            for finger in list(self.channels.keys()):
-                if finger in self.channels and self.channels[finger]:
-                    if not self.channels[finger].get_busy():
-                        self.playing[finger] = False
-                        del self.channels[finger]
+            # 只查询标记为播放中的手指，每个通道最多一次get_busy
+            pending = self._playing_mask
+            while pending:
+                low = pending & -pending
+                pending ^= low
+                if not self._channels[low.bit_length() - 1].get_busy():
+                    self._playing_mask &= ~low
         except Exception as e:
-            print(f"⚠️ 清理通道时出错: {e}", file=sys.stderr)
+            log.warning(f"⚠️ 清理通道时出错: {e}")
+    
+    def _read_latest_lines(self):
+        """读取stdin，每次唤醒只产出最新的一条完整消息
+        
+        手势状态是完整快照，积压的旧消息可以直接丢弃而不影响播放。
+        行尾换行符保留，由JSON解析器当作空白处理。
+        """
+        stdin = sys.stdin.buffer
+        
+        # Windows管道不支持select，退回逐行读取
+        if os.name == "nt":
+            for line in iter(stdin.readline, b""):
+                if not line.isspace():
+                    yield line
+            return
+        
+        # select报告可读后os.read不会阻塞，无需把stdin切换为非阻塞模式
+        # （终端下stdin与shell共享同一文件描述，改成非阻塞会影响shell之后的读取）
+        fd = stdin.fileno()
+        selector = selectors.DefaultSelector()
+        selector.register(fd, selectors.EVENT_READ)
+        pending = b""
+        
+        try:
+            while True:
+                selector.select()
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    # 输入结束：最后一条消息可能没有换行符，也要处理
+                    if pending and not pending.isspace():
+                        yield pending
+                    break
+                
+                lines = (pending + chunk).split(b"\n")
+                pending = lines.pop()  # 不完整的尾部留到下一次
+                for line in reversed(lines):
+                    if line and not line.isspace():
+                        yield line
+                        break
+        finally:
+            selector.close()
     
     def run(self):
         """主循环"""
-        print("🎧 修复版音频播放器启动", file=sys.stderr)
-        print("💡 等待手指状态数据...", file=sys.stderr)
-        print("🎹 频率映射: thumb=do, index=re, middle=mi, ring=sol, pinky=la", file=sys.stderr)
-        print("🔧 使用短音调避免音频卡住", file=sys.stderr)
+        log.info("🎧 修复版音频播放器启动")
+        log.info("💡 等待手指状态数据...")
+        log.info("🎹 频率映射: thumb=do, index=re, middle=mi, ring=sol, pinky=la")
+        log.info("🔧 使用短音调避免音频卡住")
         
         message_count = 0
-        last_cleanup = time.time()
+        last_cleanup = time.monotonic()
         
         try:
-            while True:
+            for line in self._read_latest_lines():
                 try:
-                    line = sys.stdin.readline()
-                    if not line:
-                        break
+                    self.process_data(line)
+                    message_count += 1
                     
-                    line = line.strip()
-                    if line:
-                        self.process_data(line)
-                        message_count += 1
+                    # 定期清理已结束的通道
+                    current_time = time.monotonic()
+                    if current_time - last_cleanup > 1.0:  # 每秒清理一次
+                        self.cleanup_dead_channels()
+                        last_cleanup = current_time
                         
-                        # 定期清理已结束的通道
-                        current_time = time.time()
-                        if current_time - last_cleanup > 1.0:  # 每秒清理一次
-                            self.cleanup_dead_channels()
-                            last_cleanup = current_time
-                            
-                            # 每1000条消息打印一次状态
-                            if message_count % 1000 == 0:
-                                playing_count = sum(1 for p in self.playing.values() if p)
-                                print(f"📊 处理消息: {message_count}, 播放中: {playing_count}", file=sys.stderr)
+                        # 每1000条消息打印一次状态
+                        if message_count % 1000 == 0:
+                            playing_count = self.playing_count
+                            log.info("📊 处理消息: %d, 播放中: %d", message_count, playing_count)
                     
                 except Exception as e:
-                    print(f"❌ 处理输入错误: {e}", file=sys.stderr)
+                    log.error(f"❌ 处理输入错误: {e}")
                     time.sleep(0.01)  # 短暂暂停避免疯狂循环
                     
         except KeyboardInterrupt:
-            print("\n🛑 音频播放器收到中断信号", file=sys.stderr)
+            log.warning("🛑 音频播放器收到中断信号")
         except Exception as e:
-            print(f"❌ 主循环错误: {e}", file=sys.stderr)
-            print(traceback.format_exc(), file=sys.stderr)
+            log.error(f"❌ 主循环错误: {e}")
+            log.error(traceback.format_exc())
         finally:
             self.cleanup()
     
     def cleanup(self):
         """清理资源"""
-        print("🧹 清理音频播放器...", file=sys.stderr)
+        log.info("🧹 清理音频播放器...")
         self.stop_all()
         
         try:
             # 等待所有声音停止
             time.sleep(0.1)
+            if self._sd_mixer:
+                self._sd_mixer.close()
             pygame.mixer.quit()
-            print("🎵 音频系统已关闭", file=sys.stderr)
+            log.info("🎵 音频系统已关闭")
         except Exception as e:
-            print(f"⚠️ 清理时出错: {e}", file=sys.stderr)
+            log.warning(f"⚠️ 清理时出错: {e}")
 
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description="实时手势音频播放器")
+    parser.add_argument("-v", "--verbose", action="count", default=0,
+                        help="输出更详细的日志（-v 信息，-vv 调试）")
+    parser.add_argument("--warmup", action="store_true",
+                        help="启动时立即初始化音频系统，第一次起音无等待（默认在第一次发声时才初始化）")
+    args = parser.parse_args()
+    
+    level = {0: logging.WARNING, 1: logging.INFO}.get(args.verbose, logging.DEBUG)
+    logging.basicConfig(level=level, format="%(message)s", stream=sys.stderr)
+    
     try:
         player = FixedAudioPlayer()
+        if args.warmup:
+            player.warmup()  # 主程序启动摄像头期间完成音频初始化
         player.run()
     except Exception as e:
-        print(f"❌ 音频播放器启动失败: {e}", file=sys.stderr)
-        print(traceback.format_exc(), file=sys.stderr)
+        log.error(f"❌ 音频播放器启动失败: {e}")
+        log.error(traceback.format_exc())
         sys.exit(1)
 
 if __name__ == "__main__":
     try:
         main()
     except KeyboardInterrupt:
-        print("\n🛑 音频播放器被中断", file=sys.stderr)
+        log.warning("🛑 音频播放器被中断")
     except Exception as e:
-        print(f"❌ 程序异常: {e}", file=sys.stderr)
+        log.error(f"❌ 程序异常: {e}")
     finally:
         try:
             pygame.mixer.quit()
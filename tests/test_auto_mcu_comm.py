@@ -0,0 +1,55 @@
+import contextlib
+import io
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+
+import serial
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from auto_mcu_comm import MicrocontrollerConnection
+
+
+class ReceiveWithoutFilenoTest(unittest.TestCase):
+    """loop:// 串口与Windows串口一样没有可select的描述符，fileno()抛出io.UnsupportedOperation"""
+
+    def setUp(self):
+        self.mcu = MicrocontrollerConnection()
+        self.mcu.connection = serial.serial_for_url("loop://", timeout=1)
+        with self.assertRaises(io.UnsupportedOperation):
+            self.mcu.connection.fileno()
+
+    def tearDown(self):
+        self.mcu.connection.close()
+
+    def receive(self, timeout):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            data = self.mcu.receive(timeout=timeout)
+        self.assertNotIn("接收数据失败", output.getvalue())
+        return data
+
+    def test_empty_receive_times_out_quietly(self):
+        start = time.monotonic()
+        self.assertIsNone(self.receive(timeout=0.2))
+        self.assertGreaterEqual(time.monotonic() - start, 0.15)
+        self.assertEqual(self.mcu.connection.timeout, 1)  # 临时超时已恢复
+
+    def test_receive_waits_for_late_data(self):
+        timer = threading.Timer(0.1, self.mcu.connection.write, args=(b"ok\n",))
+        timer.start()
+        try:
+            self.assertEqual(self.receive(timeout=2), "ok\n")
+        finally:
+            timer.join()
+
+    def test_receive_reads_pending_data(self):
+        self.mcu.connection.write(b"abc")
+        self.assertEqual(self.receive(timeout=0), "abc")
+
+
+if __name__ == "__main__":
+    unittest.main()
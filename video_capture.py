@@ -0,0 +1,150 @@
+import cv2
+import threading
+
+from async_log import async_print
+
+
+class LatestValueThread:
+    """后台线程不断产出新值，只保留最新的一个；消费者总是拿到最新值
+
+    子类实现 produce()，返回 (ok, value)；ok 为 False 时线程结束。
+    """
+
+    def __init__(self):
+        self.grabbed = False
+        self.value = None
+
+        # 序号：每产出一个新值加1，read()据此判断是否有新值
+        self._seq = 0
+        self._read_seq = 0
+        self.read_lock = threading.Condition(threading.Lock())
+
+        self.started = False
+        self.thread = None
+
+    def produce(self):
+        raise NotImplementedError
+
+    def start(self):
+        """启动后台线程"""
+        if self.started:
+            return self
+        self.started = True
+        self.thread = threading.Thread(target=self.update, daemon=True)
+        self.thread.start()
+        return self
+
+    def update(self):
+        """后台线程：不断产出新值写入共享槽位"""
+        while self.started:
+            grabbed, value = self.produce()
+            with self.read_lock:
+                self.grabbed = grabbed
+                self.value = value
+                self._seq += 1
+                self.read_lock.notify_all()
+            if not grabbed:
+                break
+
+        with self.read_lock:
+            self.started = False
+            self.read_lock.notify_all()
+
+    def read(self, timeout=1.0):
+        """返回最新的 (grabbed, value)
+
+        没有新值时最多等待timeout秒，避免消费者重复处理同一个值；
+        超时或后台线程已停止时返回 (False, None)。
+        """
+        with self.read_lock:
+            if not self.read_lock.wait_for(
+                lambda: self._seq != self._read_seq or not self.started, timeout
+            ) or self._seq == self._read_seq:
+                return False, None
+            self._read_seq = self._seq
+            return self.grabbed, self.value
+
+    def stop(self):
+        """停止后台线程"""
+        with self.read_lock:
+            self.started = False
+            self.read_lock.notify_all()
+        if self.thread is not None:
+            self.thread.join(timeout=1)
+            self.thread = None
+
+
+class VideoCaptureThreading(LatestValueThread):
+    """在后台线程中持续抓取摄像头画面，主循环总是拿到最新的一帧
+
+    采集（USB I/O）与手势识别（CPU计算）并行执行，识别耗时不再叠加到采集延迟上，
+    驱动缓冲区里也不会积压过期的画面。
+    """
+
+    def __init__(self, src=0, api_preference=(cv2.CAP_MSMF, cv2.CAP_DSHOW)):
+        super().__init__()
+        
+        # 可传入多个后端，按顺序尝试，使用第一个能打开的
+        if isinstance(api_preference, int):
+            api_preference = (api_preference,)
+        for api in api_preference:
+            self.cap = cv2.VideoCapture(src, api)
+            if self.cap.isOpened():
+                break
+            self.cap.release()
+        self.api_preference = api
+        
+        # 驱动端只保留一帧缓冲（DirectShow后端会忽略该设置，自带多帧队列）
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+    @property
+    def frame(self):
+        return self.value
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def set(self, prop_id, value):
+        return self.cap.set(prop_id, value)
+
+    def get(self, prop_id):
+        return self.cap.get(prop_id)
+
+    def produce(self):
+        # 不传入目标缓冲时cap.read()每次返回新分配的数组，
+        # 已交给主循环的帧不会被覆盖，交接时无需拷贝
+        return self.cap.read()
+
+    def release(self):
+        """停止采集线程并释放摄像头"""
+        self.stop()
+        self.cap.release()
+
+
+class FrameProcessingThread(LatestValueThread):
+    """流水线中的处理级：在后台线程中对上游的最新一帧调用 process(frame)
+
+    MediaPipe推理期间会释放GIL，主线程可以同时绘制、显示上一帧的结果并收发数据。
+    process 的返回值原样交给消费者，不能引用会被下一帧覆盖的缓冲区。
+    """
+
+    def __init__(self, source, process, source_timeout=1.0):
+        super().__init__()
+        self.source = source
+        self.process = process
+        self.source_timeout = source_timeout
+
+    def produce(self):
+        while self.started:
+            grabbed, frame = self.source.read(self.source_timeout)
+            if not grabbed:
+                # 超时只是采集暂时卡顿（USB/驱动、自动曝光等），继续等待；
+                # 只有上游线程真正停止时才结束
+                if self.source.started:
+                    continue
+                return False, None
+            try:
+                return True, self.process(frame)
+            except Exception as e:
+                async_print(f"❌ 帧处理线程错误: {e}")
+        return False, None